@@ -1,14 +1,60 @@
 from langchain_community.tools import DuckDuckGoSearchResults
 from langchain.tools import Tool
+import asyncio
+import functools
 import json
 import re
 import os
+import time
+import threading
 from dotenv import load_dotenv
 
+# orjson parses UTF-8 bytes in C and is ~2-3x faster than stdlib json on the
+# dict/list payloads DuckDuckGo returns - fall back to stdlib if not installed
+try:
+    import orjson
+    _json_loads = lambda s: orjson.loads(s.encode() if isinstance(s, str) else s)
+    _JSONDecodeError = orjson.JSONDecodeError
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
+    _JSONDecodeError = json.JSONDecodeError
+
 load_dotenv()
 
-# Option 1: DuckDuckGo (Free, no API key needed) - Currently active
-search_tool = DuckDuckGoSearchResults(num_results=5)
+_WORD_RE = re.compile(r"\w+")
+
+# Optional: Aho-Corasick scans all query terms over a result text in one
+# linear pass (and still catches terms embedded inside longer words)
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+def _build_term_automaton(terms):
+    """Build a query-term automaton, or None if pyahocorasick is missing"""
+    if ahocorasick is None or not terms:
+        return None
+    automaton = ahocorasick.Automaton()
+    for term in terms:
+        automaton.add_word(term, term)
+    automaton.make_automaton()
+    return automaton
+
+# Option 1: DuckDuckGo (Free, no API key needed) - Currently active.
+# Built lazily: it's only the fallback path, so workers that never search
+# (or that use the direct ddgs client) skip constructing the Tool wrapper.
+@functools.lru_cache(maxsize=1)
+def _get_search_tool():
+    return DuckDuckGoSearchResults(num_results=5)
+
+# Prefer the ddgs client directly: the LangChain Tool wrapper adds Pydantic
+# validation, callbacks and a dict->str->dict JSON round-trip on every call
+try:
+    from duckduckgo_search import DDGS
+    _ddgs = DDGS()
+except ImportError:
+    _ddgs = None
 
 # Option 2: SerpAPI (Better results, requires API key) - Uncomment to use
 # from langchain_community.tools import SerpAPIWrapper
@@ -19,35 +65,91 @@ search_tool = DuckDuckGoSearchResults(num_results=5)
 # else:
 #     print("ℹ️ Using DuckDuckGo for web search (add SERPAPI_API_KEY to .env for SerpAPI)")
 
+# In-memory TTL cache so repeated queries (common in chat follow-ups) skip the
+# DuckDuckGo round-trip. Only successful results are cached.
+_CACHE_MAX_SIZE = 512
+_CACHE_TTL = 600  # seconds
+_search_cache = {}  # (query, max_results) -> (timestamp, formatted result)
+_search_cache_lock = threading.Lock()
+
+def cache_clear():
+    """Clear the web search cache (mainly for tests)"""
+    with _search_cache_lock:
+        _search_cache.clear()
+
+def _cache_get(key):
+    with _search_cache_lock:
+        entry = _search_cache.get(key)
+        if entry is None:
+            return None
+        stamp, value = entry
+        if time.monotonic() - stamp > _CACHE_TTL:
+            del _search_cache[key]
+            return None
+        return value
+
+def _cache_put(key, value):
+    with _search_cache_lock:
+        if len(_search_cache) >= _CACHE_MAX_SIZE:
+            # Drop the oldest entry to stay bounded
+            oldest = min(_search_cache, key=lambda k: _search_cache[k][0])
+            del _search_cache[oldest]
+        _search_cache[key] = (time.monotonic(), value)
+
 def web_search_tool(query: str, max_results: int = 3) -> str:
     """Search the web using DuckDuckGo and return formatted results with relevance filtering"""
+    # Empty/near-empty queries (e.g. blank STT transcriptions) can't match
+    # anything - skip the network round-trip entirely
+    q = query.strip()
+    if not q or len(q) < 2:
+        return "No relevant web search results found for this query."
+
+    cache_key = (q.lower(), max_results)
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return cached
+
     try:
-        results = search_tool.run(query)
-        
+        if _ddgs is not None:
+            results = list(_ddgs.text(q, max_results=max_results * 2))
+        else:
+            results = _get_search_tool().run(q)
+
         # Parse the results if they come as string
         if isinstance(results, str):
             # Try to parse as JSON if possible
             try:
-                results_list = json.loads(results)
-            except json.JSONDecodeError:
+                results_list = _json_loads(results)
+            except _JSONDecodeError:
                 # If not JSON, return as is but truncated
-                return results[:2000] + "..." if len(results) > 2000 else results
+                truncated = results[:2000] + "..." if len(results) > 2000 else results
+                _cache_put(cache_key, truncated)
+                return truncated
         else:
             results_list = results
         
         # Format and filter relevant results
         formatted_results = []
-        query_terms = query.lower().split()
-        
+        query_set = set(q.lower().split())
+        q_len = len(query_set) or 1
+        term_automaton = _build_term_automaton(query_set)
+
         for i, result in enumerate(results_list[:max_results * 2]):  # Get more to filter
             if isinstance(result, dict):
                 title = result.get('title', 'No title')
-                snippet = result.get('snippet', result.get('content', 'No content'))
-                link = result.get('link', result.get('url', ''))
+                # ddgs uses body/href; the LangChain wrapper uses snippet/link
+                snippet = result.get('snippet') or result.get('body') or result.get('content', 'No content')
+                link = result.get('link') or result.get('href') or result.get('url', '')
                 
-                # Check relevance - title and snippet should contain query terms
+                # Check relevance - title and snippet should contain query
+                # terms. One Aho-Corasick pass when available, otherwise a
+                # token-set intersection; both are linear in the text length.
                 combined_text = f"{title} {snippet}".lower()
-                relevance_score = sum(1 for term in query_terms if term in combined_text) / len(query_terms)
+                if term_automaton is not None:
+                    hits = {term for _, term in term_automaton.iter(combined_text)}
+                else:
+                    hits = query_set & set(_WORD_RE.findall(combined_text))
+                relevance_score = len(hits) / q_len
                 
                 # Only include if at least 20% of query terms are found
                 if relevance_score > 0.2:
@@ -64,9 +166,26 @@ def web_search_tool(query: str, max_results: int = 3) -> str:
         
         if not formatted_results:
             return "No relevant web search results found for this query."
-        
-        return "\n\n".join(formatted_results)
+
+        formatted = "\n\n".join(formatted_results)
+        _cache_put(cache_key, formatted)
+        return formatted
         
     except Exception as e:
         print(f"Web search failed: {e}")
         return f"Web search temporarily unavailable. Error: {str(e)}"
+
+async def web_search_tool_async(query: str, max_results: int = 3) -> str:
+    """Async wrapper around web_search_tool that keeps the DuckDuckGo HTTP
+    round-trip off the event loop so it can run concurrently with other
+    retrieval sources (e.g. via asyncio.gather)."""
+    return await asyncio.to_thread(web_search_tool, query, max_results)
+
+async def web_search_tool_batch(queries, max_results: int = 3) -> list:
+    """Run several web searches concurrently and return results in order.
+
+    Sub-queries from query decomposition pay max-of-latencies instead of
+    sum-of-latencies; the TTL cache makes repeated sub-queries free."""
+    return list(await asyncio.gather(
+        *(web_search_tool_async(q, max_results) for q in queries)
+    ))
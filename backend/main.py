@@ -1,10 +1,39 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, WebSocket
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, WebSocket, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
+
+# orjson serializes responses in C, 3-10x faster than the default json
+# encoder - fall back to the stdlib-backed response class if unavailable
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse
+
+    class RAGJSONResponse(ORJSONResponse):
+        """ORJSONResponse that serializes numpy scalars/arrays (relevance
+        scores from query_rag) and non-string keys without upstream
+        float()/tolist() conversion copies."""
+
+        def render(self, content) -> bytes:
+            return orjson.dumps(
+                content,
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+            )
+
+    DefaultResponseClass = RAGJSONResponse
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    import json
+    from fastapi.responses import JSONResponse as DefaultResponseClass
+
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, default=str).encode()
 from rag.pdf_processor import extract_text_from_pdf, extract_images_from_pdf
 from rag.chroma_store import build_chroma
-from rag.query_engine import query_rag
+from rag.query_engine import query_rag, query_rag_stream, clear_response_cache
 from stt.deepgram_stt import transcribe_audio_file, get_deepgram_status
 from stt.simple_websocket import websocket_endpoint
 import os
@@ -12,13 +41,46 @@ from pathlib import Path
 import tempfile
 import shutil
 import time
-import gc
+import logging
+import logging.handlers
+import queue
 from dotenv import load_dotenv
 import asyncio
+import aiofiles
 
 # Load environment variables
 load_dotenv()
 
+# Log through a queue so stdio flushes happen on a background thread instead
+# of the request path; print() would serialize concurrent workers
+_log_queue = queue.SimpleQueue()
+_queue_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+_queue_listener.start()
+logger = logging.getLogger("ragapp")
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+# Don't propagate to the root logger: its synchronous StreamHandler would
+# emit every record a second time, on the request path
+logger.propagate = False
+
+# Cache env/config lookups at import time - env vars don't change within a
+# process, and /health gets probed frequently
+_GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+_SERPAPI_KEY = os.getenv("SERPAPI_API_KEY")
+_DEEPGRAM_API_KEY = os.getenv("DEEPGRAM_API_KEY")
+_DRIVE_CREDS_EXIST = os.path.exists("credentials.json")
+
+# Map audio MIME types to temp-file extensions for voice queries
+_EXT_BY_MIME = {
+    "audio/webm": ".webm",
+    "video/webm": ".webm",
+    "audio/mp4": ".mp4",
+    "video/mp4": ".mp4",
+    "audio/ogg": ".ogg",
+    "audio/wav": ".wav",
+    "audio/x-wav": ".wav",
+}
+
 def cleanup_file_safely(file_path: str, max_retries: int = 5, delay: float = 0.2) -> None:
     """
     Safely cleanup a temporary file with retries and proper error handling.
@@ -31,9 +93,6 @@ def cleanup_file_safely(file_path: str, max_retries: int = 5, delay: float = 0.2
     for attempt in range(max_retries):
         try:
             if os.path.exists(file_path):
-                # Force garbage collection to release any file handles
-                gc.collect()
-                
                 # Longer delay for subsequent attempts
                 if attempt > 0:
                     time.sleep(delay * (attempt + 1))
@@ -46,44 +105,48 @@ def cleanup_file_safely(file_path: str, max_retries: int = 5, delay: float = 0.2
                 
                 # Try to remove the file
                 os.unlink(file_path)
-                print(f"🗑️ Cleaned up temp file: {file_path}")
+                logger.info(f"🗑️ Cleaned up temp file: {file_path}")
                 return
                 
         except PermissionError as e:
-            print(f"⚠️ Permission error cleaning up {file_path} (attempt {attempt + 1}/{max_retries}): {e}")
+            logger.warning(f"⚠️ Permission error cleaning up {file_path} (attempt {attempt + 1}/{max_retries}): {e}")
             if attempt < max_retries - 1:
-                # Try to kill any processes that might be holding the file
-                try:
-                    import psutil
-                    for proc in psutil.process_iter(['pid', 'name', 'open_files']):
-                        try:
-                            if proc.info['open_files']:
-                                for f in proc.info['open_files']:
+                # Walking every process to find the file holder costs hundreds
+                # of ms in syscalls - only do it when debugging lock contention
+                if logger.isEnabledFor(logging.DEBUG):
+                    try:
+                        import psutil
+                        for proc in psutil.process_iter(['pid', 'name', 'open_files']):
+                            try:
+                                for f in proc.info['open_files'] or ():
                                     if file_path in f.path:
-                                        print(f"⚠️ Found process {proc.info['name']} holding file, attempting to close...")
-                                        # Don't kill the process, just note it
+                                        logger.debug(f"⚠️ Process {proc.info['name']} is holding {file_path}")
                                         break
-                        except (psutil.NoSuchProcess, psutil.AccessDenied):
-                            pass
-                except ImportError:
-                    pass  # psutil not available
-                
+                            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                                pass
+                    except ImportError:
+                        pass  # psutil not available
+
                 # Exponential backoff
                 time.sleep(delay * (2 ** attempt))
             else:
-                print(f"❌ Failed to cleanup {file_path} after {max_retries} attempts")
+                logger.error(f"❌ Failed to cleanup {file_path} after {max_retries} attempts")
                 # As a last resort, schedule for cleanup later
                 try:
                     import atexit
                     atexit.register(lambda: os.unlink(file_path) if os.path.exists(file_path) else None)
-                    print(f"📝 Scheduled {file_path} for cleanup on exit")
+                    logger.info(f"📝 Scheduled {file_path} for cleanup on exit")
                 except Exception:
                     pass
         except Exception as e:
-            print(f"⚠️ Error cleaning up {file_path}: {e}")
+            logger.warning(f"⚠️ Error cleaning up {file_path}: {e}")
             break
 
-app = FastAPI(title="Agentic RAG Chatbot", description="Advanced RAG with STT, MultiModal, Web Search, and MCP")
+app = FastAPI(
+    title="Agentic RAG Chatbot",
+    description="Advanced RAG with STT, MultiModal, Web Search, and MCP",
+    default_response_class=DefaultResponseClass,
+)
 
 # Add CORS middleware
 app.add_middleware(
@@ -106,65 +169,84 @@ app.mount("/images", StaticFiles(directory="images"), name="images")
 async def root():
     return {"message": "Agentic RAG Chatbot API", "features": ["STT", "MultiModal RAG", "Web Search", "MCP Google Drive"]}
 
+def _build_vector_store(text_chunks):
+    """Build the Chroma index and drop any responses cached against the old corpus"""
+    build_chroma(text_chunks)
+    clear_response_cache()
+
 @app.post("/upload-pdf/")
-async def upload_pdf(file: UploadFile = File(...)):
-    """Upload and process a PDF with text and image extraction"""
-    print(f"📄 Received PDF upload: {file.filename}")
+async def upload_pdf(background_tasks: BackgroundTasks, file: UploadFile = File(...), wait: bool = True):
+    """Upload and process a PDF with text and image extraction.
+
+    The embedding/index build is the dominant cost (seconds to minutes); pass
+    wait=false to queue it as a background task and return immediately."""
+    logger.info(f"📄 Received PDF upload: {file.filename}")
     try:
-        contents = await file.read()
-        print(f"📄 Read {len(contents)} bytes from {file.filename}")
-        
         # Ensure temp directory exists
         temp_dir = Path("temp")
         temp_dir.mkdir(exist_ok=True)
-        
+
+        # Stream the upload to disk in fixed-size chunks instead of buffering
+        # the whole PDF in memory; aiofiles keeps the writes off the event loop
         pdf_path = f"temp/{file.filename}"
-        with open(pdf_path, "wb") as f:
-            f.write(contents)
-        print(f"📄 Saved PDF to {pdf_path}")
+        async with aiofiles.open(pdf_path, "wb") as f:
+            while chunk := await file.read(1024 * 1024):
+                await f.write(chunk)
+        logger.info(f"📄 Saved {os.path.getsize(pdf_path)} bytes to {pdf_path}")
 
         # Extract text and images
-        print("📄 Starting text extraction...")
+        logger.info("📄 Starting text extraction...")
         text_chunks = extract_text_from_pdf(pdf_path)
-        print(f"📄 Extracted {len(text_chunks)} text chunks")
+        logger.info(f"📄 Extracted {len(text_chunks)} text chunks")
         
-        print("📄 Starting image extraction...")
+        logger.info("📄 Starting image extraction...")
         image_chunks = extract_images_from_pdf(pdf_path)
-        print(f"📄 Extracted {len(image_chunks)} image chunks")
+        logger.info(f"📄 Extracted {len(image_chunks)} image chunks")
         
-        # Merge OCR with text
-        print("📄 Merging OCR with text...")
+        # Merge OCR with text - group OCR blocks by page, then join each
+        # page's text once instead of rebuilding the string per append
+        logger.info("📄 Merging OCR with text...")
+        ocr_by_page = {}
+        image_by_page = {}
         for img in image_chunks:
-            for txt in text_chunks:
-                if img["page"] == txt["page"]:
-                    txt["text"] += "\n" + img["ocr_text"]
-                    txt["image"] = img["image_path"]
-        
-        # Build vector store
-        print("📄 Building vector store...")
-        build_chroma(text_chunks)
-        print("📄 Vector store built successfully")
+            ocr_by_page.setdefault(img["page"], []).append(img["ocr_text"])
+            image_by_page[img["page"]] = img["image_path"]
+        for txt in text_chunks:
+            page = txt["page"]
+            if page in ocr_by_page:
+                txt["text"] = "\n".join([txt["text"], *ocr_by_page[page]])
+                txt["image"] = image_by_page[page]
         
+        # Build vector store - off the event loop either way: in the
+        # threadpool when the caller waits, or as a background task
+        if wait:
+            logger.info("📄 Building vector store...")
+            await run_in_threadpool(_build_vector_store, text_chunks)
+            logger.info("📄 Vector store built successfully")
+        else:
+            logger.info("📄 Queued vector store build in background")
+            background_tasks.add_task(_build_vector_store, text_chunks)
+
         return {
-            "message": "PDF processed and embedded successfully",
+            "message": "PDF processed and embedded successfully" if wait else "PDF processed; embedding queued",
             "pages_processed": len(text_chunks),
             "images_extracted": sum(len(img.get("extracted_images", [])) for img in image_chunks),
             "filename": file.filename
         }
     except Exception as e:
-        import traceback
-        print(f"❌ Error processing PDF: {str(e)}")
-        print(f"❌ Traceback: {traceback.format_exc()}")
+        logger.exception(f"❌ Error processing PDF: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing PDF: {str(e)}")
 
 @app.post("/upload-audio/")
 async def upload_audio(file: UploadFile = File(...)):
     """Upload audio file and transcribe using Deepgram STT (with Whisper fallback)"""
     try:
-        # Save uploaded audio file
+        # Save uploaded audio file (async writes keep the event loop free)
         with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-            shutil.copyfileobj(file.file, tmp_file)
             tmp_path = tmp_file.name
+        async with aiofiles.open(tmp_path, "wb") as f:
+            while chunk := await file.read(1024 * 1024):
+                await f.write(chunk)
         
         # Transcribe audio using Deepgram
         transcription = await transcribe_audio_file(tmp_path)
@@ -175,7 +257,7 @@ async def upload_audio(file: UploadFile = File(...)):
         return {
             "transcription": transcription,
             "filename": file.filename,
-            "provider": "deepgram" if os.getenv("DEEPGRAM_API_KEY") else "whisper_fallback"
+            "provider": "deepgram" if _DEEPGRAM_API_KEY else "whisper_fallback"
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error transcribing audio: {str(e)}")
@@ -202,44 +284,61 @@ async def websocket_streaming_stt(websocket: WebSocket, client_id: str):
 async def query_endpoint(query: str = Form(...)):
     """Query the enhanced RAG system with multiple knowledge sources"""
     try:
-        result = query_rag(query)
+        # query_rag is synchronous (embeddings, vector search, LLM call) -
+        # run it in the threadpool so it doesn't block the event loop
+        result = await run_in_threadpool(query_rag, query)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
 
+@app.post("/query-stream/")
+async def query_stream_endpoint(query: str = Form(...)):
+    """Query the RAG system with streamed generation.
+
+    Emits newline-delimited JSON: token events as the LLM generates, then
+    a final event with the full result and validated citations. The first
+    token arrives in time-to-first-token instead of full generation time."""
+    def event_lines():
+        # Sync generator - FastAPI iterates it in the threadpool, keeping
+        # the blocking LLM stream off the event loop
+        for event in query_rag_stream(query):
+            yield _dumps(event) + b"\n"
+
+    return StreamingResponse(event_lines(), media_type="application/x-ndjson")
+
 @app.post("/voice-query/")
 async def voice_query(audio_file: UploadFile = File(...)):
     """Process voice query: transcribe audio then query RAG"""
     try:
-        print(f"📁 Received audio file: {audio_file.filename}, size: {audio_file.size}, type: {audio_file.content_type}")
+        logger.info(f"📁 Received audio file: {audio_file.filename}, size: {audio_file.size}, type: {audio_file.content_type}")
         
         # Validate audio file
         if not audio_file.filename:
             raise HTTPException(status_code=400, detail="No audio file provided")
         
-        # Save uploaded audio file with proper extension
-        file_extension = ".wav"  # Default to wav
+        # Save uploaded audio file with proper extension (dict dispatch on the
+        # bare MIME type instead of substring scans; default to wav)
+        file_extension = ".wav"
         if audio_file.content_type:
-            if "webm" in audio_file.content_type:
-                file_extension = ".webm"
-            elif "mp4" in audio_file.content_type:
-                file_extension = ".mp4"
-            elif "ogg" in audio_file.content_type:
-                file_extension = ".ogg"
+            mime_type = audio_file.content_type.split(";")[0].strip().lower()
+            file_extension = _EXT_BY_MIME.get(mime_type, ".wav")
         
         with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as tmp_file:
-            content = await audio_file.read()
-            tmp_file.write(content)
             tmp_path = tmp_file.name
-        
-        print(f"🎵 Audio saved to: {tmp_path}, size: {len(content)} bytes")
+        audio_bytes = 0
+        async with aiofiles.open(tmp_path, "wb") as f:
+            while chunk := await audio_file.read(1024 * 1024):
+                await f.write(chunk)
+                audio_bytes += len(chunk)
+
+        logger.info(f"🎵 Audio saved to: {tmp_path}, size: {audio_bytes} bytes")
         
         # Transcribe audio using Deepgram
         try:
             transcription = await transcribe_audio_file(tmp_path)
-            print(f"📝 Transcription result: '{transcription}'")
+            logger.info(f"📝 Transcription result: '{transcription}'")
         except Exception as transcribe_error:
-            print(f"❌ Transcription failed: {transcribe_error}")
+            logger.error(f"❌ Transcription failed: {transcribe_error}")
             # Clean up temp file before raising error
             cleanup_file_safely(tmp_path)
             raise HTTPException(status_code=500, detail=f"Audio transcription failed: {str(transcribe_error)}")
@@ -250,15 +349,15 @@ async def voice_query(audio_file: UploadFile = File(...)):
         # Query RAG with transcription
         if transcription and transcription.strip():
             try:
-                result = query_rag(transcription)
+                result = await run_in_threadpool(query_rag, transcription)
                 result["transcription"] = transcription
-                print(f"✅ Voice query completed successfully")
+                logger.info(f"✅ Voice query completed successfully")
                 return result
             except Exception as rag_error:
-                print(f"❌ RAG query failed: {rag_error}")
+                logger.error(f"❌ RAG query failed: {rag_error}")
                 raise HTTPException(status_code=500, detail=f"Query processing failed: {str(rag_error)}")
         else:
-            print("⚠️ No speech detected in audio file")
+            logger.warning("⚠️ No speech detected in audio file")
             return {
                 "response": "No speech was detected in the audio file. Please try speaking more clearly or check your microphone.",
                 "transcription": "",
@@ -268,7 +367,7 @@ async def voice_query(audio_file: UploadFile = File(...)):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Voice query error: {e}")
+        logger.error(f"❌ Voice query error: {e}")
         raise HTTPException(status_code=500, detail=f"Error processing voice query: {str(e)}")
 
 @app.get("/image/{filename}")
@@ -285,15 +384,14 @@ async def health_check():
     """Health check endpoint with service status"""
     
     # Check Google API key
-    google_api_key = os.getenv("GOOGLE_API_KEY")
-    gemini_status = "✓" if google_api_key and google_api_key != "your_google_api_key_here" else "❌ Need API key"
-    
+    gemini_status = "✓" if _GOOGLE_API_KEY and _GOOGLE_API_KEY != "your_google_api_key_here" else "❌ Need API key"
+
     # Check Google Drive credentials
-    drive_creds_exist = os.path.exists("credentials.json")
+    drive_creds_exist = _DRIVE_CREDS_EXIST
     drive_status = "✓ Real" if drive_creds_exist else "✓ Mock"
-    
+
     # Check SerpAPI key
-    serpapi_key = os.getenv("SERPAPI_API_KEY")
+    serpapi_key = _SERPAPI_KEY
     web_search_status = "✓ SerpAPI" if serpapi_key else "✓ DuckDuckGo"
     
     return {
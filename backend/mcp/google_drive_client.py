@@ -1,7 +1,11 @@
+import functools
+import io
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 from googleapiclient.discovery import build
+from googleapiclient.http import MediaIoBaseDownload
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 from google_auth_oauthlib.flow import InstalledAppFlow
@@ -11,6 +15,10 @@ class GoogleDriveMCP:
     """Model Context Protocol client for Google Drive integration"""
     
     SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
+
+    # Downstream only ever keeps a couple of KB per file, so stop pulling
+    # Drive media once this much is buffered
+    MAX_CONTENT_BYTES = 64 * 1024
     
     def __init__(self, credentials_file: str = "credentials.json", token_file: str = "token.pickle"):
         self.credentials_file = credentials_file
@@ -45,14 +53,32 @@ class GoogleDriveMCP:
         
         self.service = build('drive', 'v3', credentials=creds)
     
-    def search_files(self, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
-        """Search for files in Google Drive"""
+    @staticmethod
+    def _escape_query_term(term: str) -> str:
+        """Escape backslashes and quotes for embedding in a Drive query"""
+        return term.replace("\\", "\\\\").replace("'", "\\'")
+
+    @functools.lru_cache(maxsize=256)
+    def search_files(self, query: str, max_results: int = 10,
+                     order_by: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Search for files in Google Drive (memoized per query within the session).
+
+        Filtering happens server-side: folders and trashed files are
+        excluded in the query itself, so Drive only returns candidate
+        matches instead of entries we would discard client-side."""
         try:
-            results = self.service.files().list(
-                q=f"name contains '{query}' or fullText contains '{query}'",
-                pageSize=max_results,
-                fields="files(id, name, mimeType, modifiedTime, webViewLink, size)"
-            ).execute()
+            term = self._escape_query_term(query)
+            params = {
+                "q": (f"(name contains '{term}' or fullText contains '{term}') "
+                      "and mimeType != 'application/vnd.google-apps.folder' "
+                      "and trashed = false"),
+                "spaces": "drive",
+                "pageSize": max_results,
+                "fields": "files(id, name, mimeType, modifiedTime, webViewLink, size)",
+            }
+            if order_by:
+                params["orderBy"] = order_by
+            results = self.service.files().list(**params).execute()
             
             files = results.get('files', [])
             return files
@@ -60,31 +86,62 @@ class GoogleDriveMCP:
             print(f"Error searching Google Drive: {e}")
             return []
     
-    def get_file_content(self, file_id: str) -> Optional[str]:
-        """Get content of a text file from Google Drive"""
+    def _batch_file_metadata(self, file_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch metadata for many files in a single batched HTTP round-trip"""
+        metadata = {}
+
+        def _collect(request_id, response, exception):
+            if exception is None:
+                metadata[response['id']] = response
+            else:
+                print(f"Error fetching Drive metadata: {exception}")
+
+        batch = self.service.new_batch_http_request()
+        for file_id in file_ids:
+            batch.add(self.service.files().get(fileId=file_id, fields="id, mimeType"), callback=_collect)
+        batch.execute()
+        return metadata
+
+    def _download_capped(self, request, max_bytes: Optional[int] = None) -> str:
+        """Stream a media request in chunks, stopping once max_bytes arrived"""
+        max_bytes = max_bytes or self.MAX_CONTENT_BYTES
+        buffer = io.BytesIO()
+        downloader = MediaIoBaseDownload(buffer, request, chunksize=64 * 1024)
+        done = False
+        while not done and buffer.tell() < max_bytes:
+            _, done = downloader.next_chunk()
+        return buffer.getvalue()[:max_bytes].decode('utf-8', 'ignore')
+
+    @functools.lru_cache(maxsize=256)
+    def get_file_content(self, file_id: str, mime_type: Optional[str] = None,
+                         modified_time: Optional[str] = None) -> Optional[str]:
+        """Get content of a text file from Google Drive.
+
+        modified_time only participates in the cache key, so an edited file
+        (new modifiedTime from search) bypasses the stale cached content."""
         try:
-            # Get file metadata
-            file_metadata = self.service.files().get(fileId=file_id).execute()
-            mime_type = file_metadata.get('mimeType', '')
+            # Get file metadata unless the caller already knows the MIME type;
+            # ask only for the field we read instead of the full resource
+            if mime_type is None:
+                file_metadata = self.service.files().get(fileId=file_id, fields="mimeType").execute()
+                mime_type = file_metadata.get('mimeType', '')
             
-            # Handle different file types
+            # Handle different file types - all branches stream the media in
+            # chunks and stop at the size cap instead of buffering whole files
             if 'text/' in mime_type or 'application/json' in mime_type:
-                content = self.service.files().get_media(fileId=file_id).execute()
-                return content.decode('utf-8')
+                return self._download_capped(self.service.files().get_media(fileId=file_id))
             elif 'application/vnd.google-apps.document' in mime_type:
                 # Export Google Docs as plain text
-                content = self.service.files().export_media(
-                    fileId=file_id, 
+                return self._download_capped(self.service.files().export_media(
+                    fileId=file_id,
                     mimeType='text/plain'
-                ).execute()
-                return content.decode('utf-8')
+                ))
             elif 'application/vnd.google-apps.spreadsheet' in mime_type:
                 # Export Google Sheets as CSV
-                content = self.service.files().export_media(
-                    fileId=file_id, 
+                return self._download_capped(self.service.files().export_media(
+                    fileId=file_id,
                     mimeType='text/csv'
-                ).execute()
-                return content.decode('utf-8')
+                ))
             else:
                 return f"Cannot extract text from file type: {mime_type}"
                 
@@ -92,13 +149,31 @@ class GoogleDriveMCP:
             print(f"Error getting file content: {e}")
             return None
     
-    def search_and_retrieve(self, query: str, max_results: int = 5) -> List[Dict[str, Any]]:
+    def search_and_retrieve(self, query: str, max_results: int = 5,
+                            order_by: Optional[str] = None) -> List[Dict[str, Any]]:
         """Search for files and retrieve their content"""
-        files = self.search_files(query, max_results)
+        files = self.search_files(query, max_results, order_by)
+        if not files:
+            return []
+
+        # Search results normally carry mimeType already; collapse any missing
+        # metadata lookups into one batched round-trip (media can't batch)
+        missing = [f['id'] for f in files if 'mimeType' not in f]
+        if missing:
+            metadata = self._batch_file_metadata(missing)
+            for f in files:
+                if 'mimeType' not in f and f['id'] in metadata:
+                    f['mimeType'] = metadata[f['id']].get('mimeType')
+
+        # Content downloads are independent network calls - fetch concurrently
+        with ThreadPoolExecutor(max_workers=min(len(files), 5)) as pool:
+            contents = list(pool.map(
+                lambda f: self.get_file_content(f['id'], f.get('mimeType'), f.get('modifiedTime')),
+                files
+            ))
+
         results = []
-        
-        for file in files:
-            content = self.get_file_content(file['id'])
+        for file, content in zip(files, contents):
             if content:
                 results.append({
                     'id': file['id'],
@@ -117,7 +192,8 @@ class GoogleDriveMCP:
 class MockGoogleDriveMCP:
     """Mock MCP client for testing purposes"""
     
-    def search_and_retrieve(self, query: str, max_results: int = 5) -> List[Dict[str, Any]]:
+    def search_and_retrieve(self, query: str, max_results: int = 5,
+                            order_by: Optional[str] = None) -> List[Dict[str, Any]]:
         return [
             {
                 'id': 'mock_1',
@@ -1,20 +1,84 @@
 from langchain_community.vectorstores import Chroma
 from langchain.schema import Document
 from .embedder import embedder
+from .embed_cache import cached_embed_documents
+import chromadb
+import hashlib
+import json
+import re
+
+_WORD_RE = re.compile(r"\w+")
+
+# Shared collection name so the raw client (ingest) and the LangChain
+# wrapper (query) hit the same index
+_COLLECTION_NAME = "docs"
+
+# Chroma caps single add() calls; stay well under it
+_ADD_BATCH_SIZE = 1000
+
+# HNSW index parameters must be set when the collection is created; cosine
+# space with a larger M / ef keeps similarity_search sub-linear as the
+# corpus grows, at a small recall/build-time cost
+_HNSW_METADATA = {
+    "hnsw:space": "cosine",
+    "hnsw:M": 32,
+    "hnsw:construction_ef": 200,
+    "hnsw:search_ef": 64,
+}
+
+def _chunk_id(text: str, page) -> str:
+    """Stable content-hash ID so re-ingesting an unchanged chunk is a no-op.
+
+    The page number is part of the key so identical text on two pages
+    (blank pages, repeated headers) still yields one chunk per page."""
+    return hashlib.blake2b(f"{text}\x00{page}".encode(), digest_size=16).hexdigest()
 
 def build_chroma(docs, persist_dir="chroma_db"):
     texts = []
     metadatas = []
+    ids = []
+    seen = set()
     for doc in docs:
+        chunk_id = _chunk_id(doc["text"], doc["page"])
+        if chunk_id in seen:
+            continue
+        seen.add(chunk_id)
+        ids.append(chunk_id)
         texts.append(doc["text"])
-        metadatas.append({
+        # chunk_id rides along in metadata so retrieval can key caches
+        # (e.g. prefill/context reuse) on the exact set of chunks returned.
+        # The token set is precomputed here so query-time relevance scoring
+        # is a set intersection instead of re-tokenizing every chunk
+        metadata = {
             "page": doc["page"],
-            "image_path": doc.get("image")
-        })
+            "chunk_id": chunk_id,
+            "tokens": json.dumps(sorted(set(_WORD_RE.findall(doc["text"].lower())))),
+        }
+        if doc.get("image"):
+            metadata["image_path"] = doc["image"]
+        metadatas.append(metadata)
+
+    # One batched embedder call for cache misses only, then bulk insert
+    # through the raw client rather than one transaction per chunk
+    embeddings = cached_embed_documents(texts)
+
+    client = chromadb.PersistentClient(path=persist_dir)
+    collection = client.get_or_create_collection(_COLLECTION_NAME, metadata=_HNSW_METADATA)
+    for start in range(0, len(ids), _ADD_BATCH_SIZE):
+        end = start + _ADD_BATCH_SIZE
+        collection.upsert(
+            ids=ids[start:end],
+            embeddings=embeddings[start:end],
+            documents=texts[start:end],
+            metadatas=metadatas[start:end],
+        )
 
-    chroma = Chroma.from_texts(texts=texts, embedding=embedder, metadatas=metadatas, persist_directory=persist_dir)
-    chroma.persist()
-    return chroma
+    return load_chroma(persist_dir)
 
 def load_chroma(persist_dir="chroma_db"):
-    return Chroma(persist_directory=persist_dir, embedding_function=embedder)
+    return Chroma(
+        collection_name=_COLLECTION_NAME,
+        persist_directory=persist_dir,
+        embedding_function=embedder,
+        collection_metadata=_HNSW_METADATA,
+    )
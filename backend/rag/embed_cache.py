@@ -0,0 +1,84 @@
+"""On-disk embedding cache keyed by content hash.
+
+Wraps the shared embedder so unchanged PDF chunks and repeated queries skip
+the remote embedding call entirely. Vectors are stored as float32 blobs in a
+small SQLite database next to the Chroma persist dir.
+"""
+
+import functools
+import hashlib
+import os
+import sqlite3
+import struct
+import threading
+
+from .embedder import embedder
+
+_DB_PATH = "chroma_db/embed_cache.sqlite3"
+_lock = threading.Lock()
+_conn = None
+
+def _get_conn():
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(_DB_PATH), exist_ok=True)
+        _conn = sqlite3.connect(_DB_PATH, check_same_thread=False)
+        _conn.execute("CREATE TABLE IF NOT EXISTS cache (hash TEXT PRIMARY KEY, vec BLOB)")
+        _conn.commit()
+    return _conn
+
+def _hash(text: str) -> str:
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+def _pack(vec) -> bytes:
+    return struct.pack(f"{len(vec)}f", *vec)
+
+def _unpack(blob: bytes) -> list:
+    return list(struct.unpack(f"{len(blob) // 4}f", blob))
+
+def cached_embed_documents(texts):
+    """Embed texts, fetching cached vectors and embedding only the misses"""
+    hashes = [_hash(t) for t in texts]
+    with _lock:
+        conn = _get_conn()
+        rows = conn.execute(
+            f"SELECT hash, vec FROM cache WHERE hash IN ({','.join('?' * len(hashes))})",
+            hashes,
+        ).fetchall() if hashes else []
+    cached = {h: _unpack(blob) for h, blob in rows}
+
+    miss_indices = [i for i, h in enumerate(hashes) if h not in cached]
+    if miss_indices:
+        # One batched call for all misses
+        new_vecs = embedder.embed_documents([texts[i] for i in miss_indices])
+        with _lock:
+            conn = _get_conn()
+            conn.executemany(
+                "INSERT OR IGNORE INTO cache (hash, vec) VALUES (?, ?)",
+                [(hashes[i], _pack(vec)) for i, vec in zip(miss_indices, new_vecs)],
+            )
+            conn.commit()
+        for i, vec in zip(miss_indices, new_vecs):
+            cached[hashes[i]] = vec
+
+    return [cached[h] for h in hashes]
+
+@functools.lru_cache(maxsize=1024)
+def cached_embed_query(text: str):
+    """Embed a query with an in-process LRU on top of the disk cache.
+
+    Queries are hashed under their own namespace because the embedder may
+    use a different task type for queries than for documents."""
+    key = "q:" + _hash(text)
+    with _lock:
+        conn = _get_conn()
+        row = conn.execute("SELECT vec FROM cache WHERE hash = ?", (key,)).fetchone()
+    if row is not None:
+        return _unpack(row[0])
+
+    vec = embedder.embed_query(text)
+    with _lock:
+        conn = _get_conn()
+        conn.execute("INSERT OR IGNORE INTO cache (hash, vec) VALUES (?, ?)", (key, _pack(vec)))
+        conn.commit()
+    return vec
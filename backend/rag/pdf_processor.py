@@ -2,66 +2,105 @@ import fitz  # PyMuPDF
 import pytesseract
 from pathlib import Path
 from PIL import Image
-import io
-import base64
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
-def extract_text_from_pdf(pdf_path):
-    doc = fitz.open(pdf_path)
-    chunks = []
-    for page_no, page in enumerate(doc):
-        text = page.get_text()
-        chunks.append({
-            "page": page_no + 1,
-            "text": text,
-            "image": None
-        })
-    return chunks
+# Page-level extraction is embarrassingly parallel; workers reopen the PDF by
+# path because fitz Document objects are not picklable
+_MAX_WORKERS = min(os.cpu_count() or 1, 4)
+
+def _process_page_text(pdf_path, page_no):
+    """Worker: extract text for a single page"""
+    # filetype hint skips MuPDF's content sniffing on open
+    with fitz.open(pdf_path, filetype="pdf") as doc:
+        text = doc[page_no].get_text()
+    return {
+        "page": page_no + 1,
+        "text": text,
+        "image": None
+    }
+
+def _process_page_images(pdf_path, page_no, output_dir, save_page_images=True, dpi_scale=2):
+    """Worker: render, OCR, and save images for a single page"""
+    with fitz.open(pdf_path, filetype="pdf") as doc:
+        page = doc[page_no]
+
+        # Render grayscale at ~144 DPI: Tesseract works on grayscale anyway
+        # and the default 72 DPI RGB render wastes 3x the bytes per pixel
+        # while being too coarse for good OCR. Raw buffer goes straight to
+        # PIL - no intermediate PNG encode/decode cycle.
+        pix = page.get_pixmap(
+            matrix=fitz.Matrix(dpi_scale, dpi_scale),
+            colorspace=fitz.csGRAY,
+            alpha=False,
+        )
+        # frombuffer wraps pix.samples as a read-only view - no pixel copy
+        image = Image.frombuffer("L", (pix.width, pix.height), pix.samples, "raw", "L", 0, 1)
+
+        # Save the page image - WebP encodes 3-5x cheaper than default PNG
+        # at this quality and the citations UI only needs a preview
+        image_path = f"{output_dir}/page_{page_no + 1}.webp"
+        if save_page_images:
+            image.save(image_path, format="WEBP", quality=80, method=4)
 
-def extract_images_from_pdf(pdf_path, output_dir="images"):
-    Path(output_dir).mkdir(exist_ok=True)
-    doc = fitz.open(pdf_path)
-    image_data = []
-    
-    for page_no, page in enumerate(doc):
-        # Get page as image using PyMuPDF
-        pix = page.get_pixmap()
-        img_data = pix.tobytes("png")
-        
-        # Save the page image
-        image_path = f"{output_dir}/page_{page_no + 1}.png"
-        with open(image_path, "wb") as f:
-            f.write(img_data)
-        
         # Extract text from image using OCR
         try:
-            image = Image.open(io.BytesIO(img_data))
             ocr_text = pytesseract.image_to_string(image)
-        except Exception as e:
+        except Exception:
             # OCR is optional - system works without it
             print(f"OCR not available for page {page_no + 1} (this is normal if Tesseract is not installed)")
             ocr_text = ""
-        
+
         # Extract individual images from the page
         image_list = page.get_images()
         page_images = []
-        
+
         for img_index, img in enumerate(image_list):
             xref = img[0]
             base_image = doc.extract_image(xref)
             image_bytes = base_image["image"]
-            
+
             # Save individual image
             img_path = f"{output_dir}/page_{page_no + 1}_img_{img_index + 1}.png"
             with open(img_path, "wb") as f:
                 f.write(image_bytes)
             page_images.append(img_path)
-        
-        image_data.append({
+
+        # Release the pixmap and trim MuPDF's internal page cache so long
+        # PDFs don't accumulate resident memory across pages
+        pix = None
+        fitz.TOOLS.store_shrink(100)
+
+        return {
             "page": page_no + 1,
             "image_path": image_path,
             "ocr_text": ocr_text,
             "extracted_images": page_images
-        })
-    
-    doc.close()
+        }
+
+def _page_count(pdf_path):
+    with fitz.open(pdf_path, filetype="pdf") as doc:
+        return doc.page_count
+
+def extract_text_from_pdf(pdf_path):
+    page_count = _page_count(pdf_path)
+    if page_count <= 1 or _MAX_WORKERS == 1:
+        return [_process_page_text(pdf_path, n) for n in range(page_count)]
+
+    with ProcessPoolExecutor(max_workers=_MAX_WORKERS) as executor:
+        chunks = list(executor.map(partial(_process_page_text, pdf_path), range(page_count)))
+    chunks.sort(key=lambda c: c["page"])
+    return chunks
+
+def extract_images_from_pdf(pdf_path, output_dir="images"):
+    Path(output_dir).mkdir(exist_ok=True)
+    page_count = _page_count(pdf_path)
+    if page_count <= 1 or _MAX_WORKERS == 1:
+        return [_process_page_images(pdf_path, n, output_dir) for n in range(page_count)]
+
+    worker = partial(_process_page_images, pdf_path, output_dir=output_dir)
+    with ProcessPoolExecutor(max_workers=_MAX_WORKERS) as executor:
+        image_data = list(executor.map(worker, range(page_count)))
+    image_data.sort(key=lambda d: d["page"])
     return image_data
@@ -0,0 +1,63 @@
+"""Query routing: classify queries as external vs document-related.
+
+Kept free of heavy imports (ChromaDB, LangChain, the Gemini client) so
+tools that only need the classifier - like debug_external_query - can
+import it without paying the full query-engine import cost.
+"""
+
+import re
+
+_EXTERNAL_KEYWORDS = [
+    # Weather
+    "weather", "temperature", "climate", "rain", "snow", "sunny", "cloudy", "forecast",
+    # Current events & news
+    "news", "today", "current", "latest", "recent", "now", "happening",
+    # Financial/Market
+    "price", "stock", "market", "bitcoin", "cryptocurrency", "exchange", "trading", "usd", "eur", "dollar",
+    # Geographic/Location
+    "city", "country", "location", "map", "directions", "distance", "tokyo", "london", "paris", "new york",
+    # Time-sensitive
+    "time", "date", "schedule", "calendar", "when",
+    # General knowledge
+    "what is", "who is", "how to", "define", "meaning",
+    # Real-time data
+    "live", "real-time", "updates", "status", "current status"
+]
+
+# Document-related keywords that suggest PDF relevance
+_DOCUMENT_KEYWORDS = [
+    "document", "pdf", "file", "page", "section", "chapter", "report",
+    "uploaded", "this document", "the document", "according to", "mentioned",
+    "content", "text", "written", "shows", "describes", "analysis"
+]
+
+# Very obvious external queries
+_OBVIOUS_EXTERNAL_PATTERNS = [
+    "weather in", "temperature in", "price of", "cost of", "bitcoin", "cryptocurrency",
+    "current", "today", "latest", "news about", "what happened", "live"
+]
+
+# Trigger-word sets for source selection, hoisted so query_rag does three
+# set intersections against the already-tokenized query
+_CURRENT_TRIGGERS = frozenset({"latest", "current", "recent", "update", "updates", "new", "today", "now"})
+_REALTIME_TRIGGERS = frozenset({"news", "market", "price", "stock", "weather", "event"})
+_DOCUMENT_TRIGGERS = frozenset({"document", "file", "report", "my", "our", "company"})
+
+def _compile_keyword_re(keywords):
+    """One compiled alternation scans all keywords in a single C-level pass"""
+    return re.compile(r"\b(?:" + "|".join(map(re.escape, keywords)) + r")\b")
+
+_EXTERNAL_RE = _compile_keyword_re(_EXTERNAL_KEYWORDS)
+_DOCUMENT_RE = _compile_keyword_re(_DOCUMENT_KEYWORDS)
+_OBVIOUS_EXTERNAL_RE = _compile_keyword_re(_OBVIOUS_EXTERNAL_PATTERNS)
+
+def is_external_query(query: str) -> bool:
+    """Determine if query is asking for external information not related to documents"""
+    query_lower = query.lower()
+
+    # Document keywords win - if found, it's likely document-related
+    if _DOCUMENT_RE.search(query_lower):
+        return False
+
+    # Otherwise external keywords or obvious external phrasing mark it external
+    return bool(_EXTERNAL_RE.search(query_lower) or _OBVIOUS_EXTERNAL_RE.search(query_lower))
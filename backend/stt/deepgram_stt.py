@@ -4,56 +4,168 @@ Clean and focused on just working with WebSocket
 """
 
 import asyncio
+import functools
 import json
 import os
 import logging
+import threading
+import time
 from typing import Callable, Optional
 from deepgram import DeepgramClient, PrerecordedOptions, FileSource
 import tempfile
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Live streaming support (SDK v3+); fall back to per-chunk REST if absent
+try:
+    from deepgram import LiveOptions, LiveTranscriptionEvents
+except ImportError:
+    LiveOptions = None
+    LiveTranscriptionEvents = None
+
+# Logging config is the application's job (main.py routes through a queue);
+# configuring the root logger at import time would install a synchronous
+# stderr handler for the whole process
 logger = logging.getLogger(__name__)
 
+# Whisper weights (~140 MB for "base") load once and are reused by every
+# fallback call; the lock keeps concurrent first calls from double-loading
+_WHISPER_MODEL = None
+_WHISPER_LOCK = threading.Lock()
+
+def _get_whisper_model():
+    global _WHISPER_MODEL
+    import whisper
+    with _WHISPER_LOCK:
+        if _WHISPER_MODEL is None:
+            _WHISPER_MODEL = whisper.load_model("base")
+    return _WHISPER_MODEL
+
+# One client per key reuses the underlying HTTP connection pool across
+# transcription requests instead of re-handshaking each time
+@functools.lru_cache(maxsize=4)
+def _get_deepgram_client(api_key: str) -> DeepgramClient:
+    return DeepgramClient(api_key)
+
 class DeepgramStreamingSTT:
     """Simple real-time streaming STT using Deepgram API"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    # REST fallback coalescing: ~500 ms of 16 kHz 16-bit mono audio per
+    # request instead of one TLS round-trip per tiny chunk
+    _REST_FLUSH_BYTES = int(16000 * 2 * 0.5)
+    _REST_FLUSH_SECONDS = 0.5
+
+    def __init__(self, api_key: Optional[str] = None, client: Optional[DeepgramClient] = None):
         self.api_key = api_key or os.getenv("DEEPGRAM_API_KEY")
-        self.client = None
+        self.client = client
+        self.live = None
         self.is_connected = False
         self.callback = None
+        self._rest_buffer = bytearray()
+        self._last_flush = time.monotonic()
         
-        if self.api_key:
-            try:
-                self.client = DeepgramClient(self.api_key)
-                logger.info("✅ Deepgram client initialized successfully")
-            except Exception as e:
-                logger.error(f"❌ Failed to initialize Deepgram client: {e}")
-                self.client = None
-        else:
-            logger.warning("⚠️ No Deepgram API key provided")
+        # Per-session state stays on this instance; the underlying client
+        # (and its HTTPS connection pool) is shared across all sessions
+        if self.client is None:
+            if self.api_key:
+                try:
+                    self.client = _get_deepgram_client(self.api_key)
+                    logger.info("✅ Deepgram client initialized successfully")
+                except Exception as e:
+                    logger.error(f"❌ Failed to initialize Deepgram client: {e}")
+                    self.client = None
+            else:
+                logger.warning("⚠️ No Deepgram API key provided")
     
     def is_available(self) -> bool:
         """Check if Deepgram is available"""
         return self.client is not None and self.api_key is not None
     
+    async def start_streaming(self, callback: Callable[[str], None]) -> bool:
+        """Open the live WebSocket once; subsequent chunks are sent over it.
+
+        One connection per client replaces a temp file + HTTPS round-trip
+        per 100-ms chunk - the live API is what Deepgram designed for this."""
+        if not self.is_available() or LiveOptions is None:
+            return False
+
+        try:
+            self.callback = callback
+            self.live = self.client.listen.asynclive.v("1")
+
+            async def _on_transcript(_conn, result, **kwargs):
+                try:
+                    transcript = result.channel.alternatives[0].transcript
+                except (AttributeError, IndexError):
+                    return
+                if transcript and transcript.strip() and self.callback:
+                    self.callback(transcript.strip())
+                    logger.info(f"📝 Deepgram transcription: {transcript.strip()}")
+
+            self.live.on(LiveTranscriptionEvents.Transcript, _on_transcript)
+            await self.live.start(LiveOptions(
+                model="nova-2",
+                smart_format=True,
+                punctuate=True,
+                language="en-US",
+                interim_results=False,
+            ))
+            self.is_connected = True
+            logger.info("🔗 Deepgram live connection opened")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to open Deepgram live connection: {e}")
+            self.live = None
+            return False
+
+    async def finish_streaming(self):
+        """Close the live WebSocket, flushing any buffered audio"""
+        if self._rest_buffer and self.callback:
+            await self._flush_rest(self.callback)
+        if self.live is not None:
+            try:
+                await self.live.finish()
+            except Exception as e:
+                logger.error(f"❌ Error closing Deepgram live connection: {e}")
+            self.live = None
+            self.is_connected = False
+
     async def process_audio_chunk(self, audio_data: bytes, callback: Callable[[str], None]):
         """Process audio chunk with Deepgram"""
         if not self.is_available():
             logger.error("❌ Deepgram not available")
             return
-        
+
+        # Preferred path: one live WebSocket per client, raw bytes in
+        if self.live is None and not self.is_connected:
+            await self.start_streaming(callback)
+
+        if self.live is not None:
+            self.callback = callback
+            try:
+                await self.live.send(audio_data)
+                return
+            except Exception as e:
+                logger.error(f"❌ Live send failed, falling back to REST: {e}")
+                await self.finish_streaming()
+
+        # Fallback: coalesce chunks and fire one REST request per flush
+        # window rather than one per chunk - the bytes stay in memory, no
+        # temp-file write/read cycle
+        self._rest_buffer.extend(audio_data)
+        if (len(self._rest_buffer) >= self._REST_FLUSH_BYTES
+                or time.monotonic() - self._last_flush >= self._REST_FLUSH_SECONDS):
+            await self._flush_rest(callback)
+
+    async def _flush_rest(self, callback: Callable[[str], None]):
+        """Send the buffered audio to the prerecorded endpoint and reset"""
+        if not self._rest_buffer:
+            self._last_flush = time.monotonic()
+            return
+
+        buffer_data = bytes(self._rest_buffer)
+        self._rest_buffer.clear()
+        self._last_flush = time.monotonic()
+
         try:
-            # Create temporary file for audio data
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp_file:
-                tmp_file.write(audio_data)
-                tmp_path = tmp_file.name
-            
-            # Use Deepgram prerecorded for chunk processing
-            with open(tmp_path, 'rb') as audio_file:
-                buffer_data = audio_file.read()
-            
             payload = {"buffer": buffer_data}
             options = PrerecordedOptions(
                 model="nova-2",
@@ -61,18 +173,15 @@ class DeepgramStreamingSTT:
                 punctuate=True,
                 language="en-US"
             )
-            
+
             response = self.client.listen.prerecorded.v("1").transcribe_file(payload, options)
-            
+
             if response.results and response.results.channels:
                 transcript = response.results.channels[0].alternatives[0].transcript
                 if transcript and transcript.strip():
                     callback(transcript.strip())
                     logger.info(f"📝 Deepgram transcription: {transcript.strip()}")
-            
-            # Clean up temp file
-            os.unlink(tmp_path)
-            
+
         except Exception as e:
             logger.error(f"❌ Error processing audio chunk: {e}")
 
@@ -86,7 +195,7 @@ async def transcribe_audio_file_deepgram(file_path: str, api_key: Optional[str]
         return await _fallback_whisper_transcription(file_path)
     
     try:
-        deepgram = DeepgramClient(api_key)
+        deepgram = _get_deepgram_client(api_key)
         
         with open(file_path, 'rb') as audio_file:
             buffer_data = audio_file.read()
@@ -114,17 +223,49 @@ async def transcribe_audio_file_deepgram(file_path: str, api_key: Optional[str]
         return await _fallback_whisper_transcription(file_path)
 
 
+def _load_audio_16k_mono(file_path: str):
+    """Decode audio to a float32 mono 16 kHz numpy array, entirely in memory.
+
+    soundfile + soxr avoid the pydub path, which shells out to ffmpeg and
+    bounces the converted audio through a temp WAV on disk. Returns None
+    if the in-memory decoders are unavailable or can't read the format."""
+    try:
+        import numpy as np
+        import soundfile as sf
+        import soxr
+    except ImportError:
+        return None
+
+    try:
+        data, sample_rate = sf.read(file_path, dtype="float32")
+    except Exception as e:
+        logger.warning(f"soundfile could not decode {file_path}: {e}")
+        return None
+
+    if data.ndim > 1:
+        data = data.mean(axis=1)
+    if sample_rate != 16000:
+        data = soxr.resample(data, sample_rate, 16000)
+    return data
+
+
 async def _fallback_whisper_transcription(file_path: str) -> str:
     """Fallback transcription using Whisper"""
     try:
-        import whisper
-        from pydub import AudioSegment
-        
         logger.info("🔄 Using Whisper fallback transcription")
         
-        model = whisper.load_model("base")
-        
-        # Convert audio if needed
+        model = _get_whisper_model()
+
+        # Preferred path: in-memory decode/resample straight into Whisper,
+        # which accepts float32 arrays natively - no ffmpeg, no temp file
+        audio = _load_audio_16k_mono(file_path)
+        if audio is not None:
+            result = model.transcribe(audio)
+            return result["text"].strip()
+
+        # Fallback: pydub/ffmpeg conversion through a temp WAV
+        from pydub import AudioSegment
+
         try:
             audio_segment = AudioSegment.from_file(file_path)
             if audio_segment.channels > 1:
@@ -44,11 +44,39 @@ class SimpleStreamingSTT:
         if client_id in self.connections:
             del self.connections[client_id]
         
-        if client_id in self.stt_instances:
-            del self.stt_instances[client_id]
-        
+        stt = self.stt_instances.pop(client_id, None)
+        if stt is not None:
+            # Flush and close the live Deepgram connection for this client
+            await stt.finish_streaming()
+
         logger.info(f"🔌 Client {client_id} disconnected")
     
+    async def handle_audio(self, client_id: str, audio_bytes: bytes,
+                           websocket: WebSocket = None, stt: DeepgramStreamingSTT = None):
+        """Handle a raw binary audio frame - no JSON envelope, no base64.
+
+        Callers on the per-chunk hot path pass websocket/stt directly to
+        skip the two dict lookups per frame."""
+        websocket = websocket or self.connections.get(client_id)
+        stt = stt or self.stt_instances.get(client_id)
+
+        if not websocket or not stt:
+            return
+
+        try:
+            await stt.process_audio_chunk(audio_bytes, lambda text:
+                asyncio.create_task(websocket.send_json({
+                    "type": "transcription",
+                    "data": {"text": text}
+                }))
+            )
+        except Exception as e:
+            logger.error(f"Error processing audio chunk: {e}")
+            await websocket.send_json({
+                "type": "error",
+                "data": {"message": str(e)}
+            })
+
     async def handle_message(self, client_id: str, message: Dict[str, Any]):
         """Handle WebSocket message"""
         try:
@@ -60,26 +88,11 @@ class SimpleStreamingSTT:
                 return
             
             if message_type == "audio_chunk":
-                # Process audio chunk
+                # Legacy JSON path: base64 inflates audio 33% on the wire -
+                # clients should prefer raw binary frames (handle_audio)
                 audio_data = message.get("data", {}).get("audio")
                 if audio_data:
-                    try:
-                        # Decode base64 audio
-                        audio_bytes = base64.b64decode(audio_data)
-                        
-                        # Process with Deepgram
-                        await stt.process_audio_chunk(audio_bytes, lambda text: 
-                            asyncio.create_task(websocket.send_json({
-                                "type": "transcription",
-                                "data": {"text": text}
-                            }))
-                        )
-                    except Exception as e:
-                        logger.error(f"Error processing audio chunk: {e}")
-                        await websocket.send_json({
-                            "type": "error",
-                            "data": {"message": str(e)}
-                        })
+                    await self.handle_audio(client_id, base64.b64decode(audio_data))
             
             elif message_type == "ping":
                 await websocket.send_json({
@@ -106,12 +119,21 @@ streaming_stt = SimpleStreamingSTT()
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
     """WebSocket endpoint for streaming STT"""
     await streaming_stt.connect(websocket, client_id)
+    stt = streaming_stt.stt_instances.get(client_id)
     
     try:
         while True:
-            message = await websocket.receive_json()
-            await streaming_stt.handle_message(client_id, message)
-            
+            # Dispatch on frame type: binary frames carry raw audio bytes
+            # (no base64 overhead), text frames carry control JSON
+            message = await websocket.receive()
+            if message.get("type") == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                await streaming_stt.handle_audio(client_id, message["bytes"],
+                                                 websocket=websocket, stt=stt)
+            elif message.get("text") is not None:
+                await streaming_stt.handle_message(client_id, json.loads(message["text"]))
+
     except WebSocketDisconnect:
         logger.info(f"Client {client_id} disconnected")
     except Exception as e:
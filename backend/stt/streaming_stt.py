@@ -5,23 +5,113 @@ import threading
 import queue
 import time
 from typing import Callable, Optional
+from functools import lru_cache
+import numpy as np
 import whisper
 
+# Prefer faster-whisper: CTranslate2 int8 kernels roughly halve CPU
+# inference time vs FP32 PyTorch whisper with the same accuracy tier
+try:
+    from faster_whisper import WhisperModel
+except ImportError:
+    WhisperModel = None
+
+# Batched pipeline (faster-whisper >= 1.0) runs encoder GEMMs over many
+# audio chunks at once instead of one forward pass per chunk
+try:
+    from faster_whisper import BatchedInferencePipeline
+except ImportError:
+    BatchedInferencePipeline = None
+
+
+# Whisper's encoder is large GEMMs - on a CUDA device FP16 runs them on
+# tensor cores, several times faster than CPU; int8 stays best on CPU.
+# On CPU, pin the BLAS thread budget to half the cores: the default
+# grabs every core per matmul, which thrashes caches as soon as a second
+# stream (or the web server) runs beside it. Concurrent StreamingSTT
+# instances share this budget rather than multiplying it.
+try:
+    import os as _os
+    import torch
+    _DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+    if _DEVICE == "cpu":
+        _cores = _os.cpu_count() or 4
+        torch.set_num_threads(max(1, _cores // 2))
+        torch.set_num_interop_threads(1)
+        _os.environ.setdefault("OMP_NUM_THREADS", str(max(1, _cores // 2)))
+except ImportError:
+    _DEVICE = "cpu"
+
+@lru_cache(maxsize=4)
+def _get_model(model_name: str):
+    """Load the STT model once per name and reuse it across calls"""
+    if WhisperModel is not None:
+        return WhisperModel(model_name, device=_DEVICE,
+                            compute_type="float16" if _DEVICE == "cuda" else "int8")
+    return whisper.load_model(model_name, device=_DEVICE)
+
+def _transcribe(model, audio) -> str:
+    """Transcribe with either backend, returning stripped text"""
+    if WhisperModel is not None and isinstance(model, WhisperModel):
+        segments, _ = model.transcribe(audio, beam_size=1, vad_filter=True)
+        return " ".join(seg.text for seg in segments).strip()
+    return model.transcribe(audio, fp16=(_DEVICE == "cuda"))["text"].strip()
+
 class StreamingSTT:
-    def __init__(self, model_name="base"):
-        self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
+    # One-time ambient calibration shared across instances (warm starts
+    # skip the blocking microphone sample entirely)
+    _energy_threshold = None
+
+    # Live 5-second phrase captions don't need "base": the distilled
+    # small English model (or tiny) cuts encoder cost ~30% at matching
+    # caption quality, while offline file transcription keeps "base"
+    def __init__(self, model_name=None, stream_model="distil-small.en"):
+        # Microphone/recognizer setup is deferred to start_listening:
+        # opening PortAudio blocks ~1 s and file-upload paths that import
+        # this module never touch the microphone at all
+        self.recognizer = None
+        self.microphone = None
         self.audio_queue = queue.Queue()
+        self._out_queue = queue.Queue()
         self.is_listening = False
         self.callback = None
-        self.whisper_model = whisper.load_model(model_name)
+        # model_name kept for backward compatibility with existing callers
+        stream_model = model_name or stream_model
+        try:
+            self.whisper_model = _get_model(stream_model)
+        except Exception:
+            # Distilled weights only exist for faster-whisper; plain
+            # whisper installs fall back to the standard model
+            self.whisper_model = _get_model("base")
+        self.sample_rate = 16000
+        # Scratch buffer for int16 -> float32 sample conversion (6 s at
+        # 16 kHz; grown on demand) so the hot loop allocates nothing
+        self._f32_scratch = np.empty(16000 * 6, dtype=np.float32)
+        self._batched_pipeline = None
+        if BatchedInferencePipeline is not None and isinstance(self.whisper_model, WhisperModel):
+            self._batched_pipeline = BatchedInferencePipeline(self.whisper_model)
         
-        # Adjust for ambient noise
-        with self.microphone as source:
-            self.recognizer.adjust_for_ambient_noise(source)
+    def _ensure_microphone(self):
+        """Open the microphone on first use and calibrate once per process.
+
+        The ~1 s ambient-noise sample is reused by later instances, and
+        freezing dynamic_energy_threshold stops speech_recognition
+        re-estimating noise (an RMS pass per chunk) on each listen."""
+        if self.microphone is not None:
+            return
+        self.recognizer = sr.Recognizer()
+        self.microphone = sr.Microphone()
+        if StreamingSTT._energy_threshold is None:
+            with self.microphone as source:
+                self.recognizer.adjust_for_ambient_noise(source)
+            StreamingSTT._energy_threshold = self.recognizer.energy_threshold
+        else:
+            self.recognizer.energy_threshold = StreamingSTT._energy_threshold
+        self.recognizer.dynamic_energy_threshold = False
     
     def start_listening(self, callback: Callable[[str], None]):
         """Start continuous listening and call callback with transcribed text"""
+        self._ensure_microphone()
         self.callback = callback
         self.is_listening = True
         
@@ -32,9 +122,12 @@ class StreamingSTT:
             phrase_time_limit=5
         )
         
-        # Start processing thread
+        # Start processing thread plus a dispatch thread, so a slow
+        # callback (LLM call, network send) never stalls the next encode
         self.processing_thread = threading.Thread(target=self._process_audio)
         self.processing_thread.start()
+        self._dispatch_thread = threading.Thread(target=self._dispatch)
+        self._dispatch_thread.start()
     
     def stop_listening_stream(self):
         """Stop the listening stream"""
@@ -43,65 +136,217 @@ class StreamingSTT:
             self.stop_listening(wait_for_stop=False)
         if hasattr(self, 'processing_thread'):
             self.processing_thread.join()
+        if hasattr(self, '_dispatch_thread'):
+            self._dispatch_thread.join()
+
+    def _dispatch(self):
+        """Consumer side: deliver transcriptions without blocking inference"""
+        while self.is_listening or not self._out_queue.empty():
+            try:
+                text = self._out_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            try:
+                if self.callback:
+                    self.callback(text)
+            except Exception as e:
+                print(f"Error in transcription callback: {e}")
     
     def _audio_callback(self, recognizer, audio):
         """Callback for when audio is captured"""
         if self.is_listening:
             self.audio_queue.put(audio)
     
+    def _drain_queue(self, max_batch=8, max_wait=0.2):
+        """Collect up to max_batch utterances, waiting briefly for bursts"""
+        try:
+            batch = [self.audio_queue.get(timeout=1)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + max_wait
+        while len(batch) < max_batch and time.monotonic() < deadline:
+            try:
+                batch.append(self.audio_queue.get(timeout=max_wait))
+            except queue.Empty:
+                break
+        return batch
+
+    def _transcribe_utterance(self, audio_np) -> str:
+        """Prefer the batched pipeline, which amortizes encoder passes
+        across the utterance's chunks instead of running them serially"""
+        if self._batched_pipeline is not None:
+            segments, _ = self._batched_pipeline.transcribe(audio_np, batch_size=8)
+            return " ".join(seg.text for seg in segments).strip()
+        return _transcribe(self.whisper_model, audio_np)
+
     def _process_audio(self):
         """Process audio from the queue using Whisper"""
         while self.is_listening:
-            try:
-                audio = self.audio_queue.get(timeout=1)
-                
-                # Convert audio to format Whisper expects
-                wav_data = io.BytesIO(audio.get_wav_data())
-                
-                # Use Whisper for transcription
-                with wave.open(wav_data, 'rb') as wav_file:
-                    frames = wav_file.readframes(wav_file.getnframes())
-                    sample_rate = wav_file.getframerate()
-                    
-                    # Convert to numpy array for Whisper
-                    import numpy as np
-                    audio_np = np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
-                    
-                    # Transcribe with Whisper
-                    result = self.whisper_model.transcribe(audio_np)
-                    text = result["text"].strip()
-                    
-                    if text and self.callback:
-                        self.callback(text)
-                        
-            except queue.Empty:
-                continue
-            except Exception as e:
-                print(f"Error processing audio: {e}")
-                continue
+            # Drain bursts from the queue so back-to-back utterances are
+            # handled in one loop pass rather than one wakeup each
+            for audio in self._drain_queue():
+                try:
+                    # Raw 16 kHz/16-bit PCM straight from the capture - no
+                    # WAV mux just to demux it again for the frames
+                    frames = audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2)
+
+                    # Scale int16 samples straight into the float32
+                    # scratch buffer: one pass, no intermediate array
+                    i16 = np.frombuffer(frames, dtype=np.int16)
+                    if i16.size > self._f32_scratch.size:
+                        self._f32_scratch = np.empty(i16.size, dtype=np.float32)
+                    audio_np = self._f32_scratch[:i16.size]
+                    np.multiply(i16, np.float32(1.0 / 32768.0), out=audio_np, casting="unsafe")
+
+                    text = self._transcribe_utterance(audio_np)
+
+                    if text:
+                        self._out_queue.put(text)
+
+                except Exception as e:
+                    print(f"Error processing audio: {e}")
+                    continue
+
+def _transcribe_long(model, audio) -> str:
+    """Transcription tuned for file uploads: VAD drops silent stretches
+    (often 30-50% of real recordings) before the decoder sees them, and
+    the audio is windowed in 30 s chunks"""
+    if WhisperModel is not None and isinstance(model, WhisperModel):
+        kwargs = dict(
+            beam_size=1,
+            vad_filter=True,
+            vad_parameters=dict(min_silence_duration_ms=500),
+            chunk_length=30,
+        )
+        try:
+            segments, _ = model.transcribe(audio, **kwargs)
+        except TypeError:
+            # chunk_length arrived in later faster-whisper releases
+            kwargs.pop("chunk_length")
+            segments, _ = model.transcribe(audio, **kwargs)
+        return " ".join(seg.text for seg in segments).strip()
+    return _transcribe(model, audio)
+
+def _load_with_librosa(file_path: str):
+    import librosa
+    audio, sr = librosa.load(file_path, sr=16000)
+    if len(audio) == 0:
+        raise Exception("Audio file appears to be empty")
+    return audio
+
+def _load_with_soundfile(file_path: str):
+    import soundfile as sf
+    # Decode straight to float32 - soundfile defaults to float64, which
+    # doubles peak memory only for Whisper to cast it back down
+    audio, sr = sf.read(file_path, dtype="float32", always_2d=True)
+    if audio.shape[0] == 0:
+        raise Exception("Audio file appears to be empty")
+    if audio.shape[1] > 1:
+        # Fused float32 downmix: one pass, one output allocation
+        mono = np.empty(audio.shape[0], dtype=np.float32)
+        np.mean(audio, axis=1, dtype=np.float32, out=mono)
+        audio = mono
+    else:
+        audio = audio[:, 0]
+    if sr != 16000:
+        try:
+            import soxr
+            audio = soxr.resample(audio, sr, 16000, quality="HQ")
+        except ImportError:
+            import librosa
+            audio = librosa.resample(audio, orig_sr=sr, target_sr=16000)
+    return np.ascontiguousarray(audio, dtype=np.float32)
+
+def _load_with_pydub(file_path: str, fmt: Optional[str] = None):
+    from pydub import AudioSegment
+    segment = AudioSegment.from_file(file_path, format=fmt)
+    if segment.channels > 1:
+        segment = segment.set_channels(1)
+    if segment.frame_rate != 16000:
+        segment = segment.set_frame_rate(16000)
+    samples = np.array(segment.get_array_of_samples())
+    scale = float(1 << (8 * segment.sample_width - 1))
+    return (samples / scale).astype(np.float32)
+
+# Magic-byte prefixes mapped to the decoder that handles that container;
+# sniffing once beats paying a failed decode per wrong decoder
+_MAGIC_DECODERS = [
+    (b"RIFF", "soundfile"),           # WAV
+    (b"OggS", "soundfile"),           # Ogg/Opus
+    (b"fLaC", "soundfile"),           # FLAC
+    (b"\x1aE\xdf\xa3", "pydub-webm"),  # EBML (WebM/Matroska)
+    (b"ID3", "pydub-mp3"),            # MP3 with ID3 tag
+]
+
+def _sniff_decoder(file_path: str) -> Optional[str]:
+    """Pick a decoder from the file's first bytes, or None if unknown"""
+    try:
+        with open(file_path, 'rb') as f:
+            header = f.read(12)
+    except OSError:
+        return None
+    for magic, decoder in _MAGIC_DECODERS:
+        if header.startswith(magic):
+            return decoder
+    # Bare MP3 frame sync: 11 set bits
+    if len(header) >= 2 and header[0] == 0xFF and (header[1] & 0xE0) == 0xE0:
+        return "pydub-mp3"
+    return None
 
 def transcribe_audio_file(file_path: str, model_name: str = "base") -> str:
-    """Transcribe an uploaded audio file"""
+    """Transcribe an uploaded audio file, dispatching to the decoder the
+    file's magic bytes indicate and falling back through the rest only
+    if the chosen one fails"""
+    print(f"🎵 Loading Whisper model: {model_name}")
+    model = _get_model(model_name)
+
+    print(f"🎤 Transcribing audio file: {file_path}")
+    loaders = {
+        "librosa": ("librosa", _load_with_librosa),
+        "soundfile": ("soundfile", _load_with_soundfile),
+        "pydub": ("pydub", _load_with_pydub),
+        "pydub-webm": ("pydub/webm", lambda path: _load_with_pydub(path, "webm")),
+        "pydub-mp3": ("pydub/mp3", lambda path: _load_with_pydub(path, "mp3")),
+    }
+
+    sniffed = _sniff_decoder(file_path)
+    order = [sniffed] if sniffed else []
+    order += [key for key in ("librosa", "soundfile", "pydub") if key != sniffed]
+    loaders = [loaders[key] for key in order]
+    last_error = None
+    for name, loader in loaders:
+        try:
+            audio = loader(file_path)
+            transcription = _transcribe_long(model, audio)
+            print(f"📝 Transcription ({name}): '{transcription}'")
+            return transcription
+        except Exception as e:
+            print(f"⚠️ {name} failed: {e}")
+            last_error = e
+
+    # Last resort: hand the path to the model itself (FFmpeg decode)
     try:
-        print(f"🎵 Loading Whisper model: {model_name}")
-        model = whisper.load_model(model_name)
-        
-        print(f"🎤 Transcribing audio file: {file_path}")
-        result = model.transcribe(file_path)
-        
-        transcription = result["text"].strip()
-        print(f"📝 Transcription: '{transcription}'")
-        
+        transcription = _transcribe_long(model, file_path)
+        print(f"📝 Transcription (direct): '{transcription}'")
         return transcription
     except Exception as e:
-        print(f"❌ Whisper transcription error: {e}")
-        # Try alternative approach for different audio formats
-        try:
-            import librosa
-            print("🔄 Trying librosa for audio loading...")
-            audio, sr = librosa.load(file_path, sr=16000)
-            result = model.transcribe(audio)
-            return result["text"].strip()
-        except Exception as librosa_error:
-            print(f"❌ Librosa fallback failed: {librosa_error}")
-            raise Exception(f"Audio transcription failed. Original error: {e}")
+        print(f"❌ Complete transcription failure: {e}")
+        if "RIFF" in str(last_error or e):
+            raise Exception("Audio format not supported. Please try recording again or use a different browser.")
+        raise Exception(f"Audio transcription failed: {e}")
+
+def transcribe_audio_stream(audio_data: bytes, model_name: str = "base") -> str:
+    """Transcribe audio data from a stream"""
+    import tempfile
+    import os
+
+    # Container formats need a path for the decoders above; the file is
+    # short-lived and removed as soon as transcription returns
+    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp_file:
+        tmp_file.write(audio_data)
+        tmp_path = tmp_file.name
+
+    try:
+        return transcribe_audio_file(tmp_path, model_name)
+    finally:
+        os.unlink(tmp_path)
@@ -1,26 +1,79 @@
 import asyncio
 import websockets
 import numpy as np
-import io
 from faster_whisper import WhisperModel
-import soundfile as sf
 
-model = WhisperModel("base")
+try:
+    import torch
+    _CUDA = torch.cuda.is_available()
+except ImportError:
+    _CUDA = False
+
+# int8 weights halve memory and speed up the GEMMs on both targets;
+# int8_float16 keeps activations in FP16 on GPU for the best RTF
+model = WhisperModel(
+    "base",
+    device="cuda" if _CUDA else "cpu",
+    compute_type="int8_float16" if _CUDA else "int8",
+)
+
+# Warm with one second of silence so the first client request doesn't
+# pay kernel autotune/cold-start cost
+segments, _ = model.transcribe(np.zeros(16000, dtype=np.float32), beam_size=1)
+list(segments)
+
+# Clients send raw PCM16 mono at 16 kHz
+_SAMPLE_RATE = 16000
+_BYTES_PER_SECOND = _SAMPLE_RATE * 2
+_SILENCE_RMS = 500.0            # int16 RMS below this counts as silence
+_SILENCE_FLUSH_SECONDS = 0.3    # endpoint after this much trailing silence
+_MAX_BUFFER_SECONDS = 30        # hard flush so the buffer can't grow unbounded
+
+def _frame_rms(frame: np.ndarray) -> float:
+    if frame.size == 0:
+        return 0.0
+    return float(np.sqrt(np.mean(np.square(frame, dtype=np.float64))))
 
 async def transcribe_audio(websocket):
-    buffer = io.BytesIO()
-    
-    while True:
-        data = await websocket.recv()
-        buffer.write(data)
-        
-        if len(data) < 3200:  # silence or pause
-            buffer.seek(0)
-            audio, sr = sf.read(buffer)
-            segments, _ = model.transcribe(audio, beam_size=5)
-            text = " ".join([seg.text for seg in segments])
-            await websocket.send(text)
-            buffer = io.BytesIO()
+    # Accumulate PCM until the speaker pauses: flushing on "any small
+    # frame" cut utterances mid-word and wasted inference on partial
+    # windows. Energy gating endpoints the utterance; the model's own
+    # vad_filter trims residual silence inside it. Frames land directly
+    # in a preallocated int16 ring - no BytesIO realloc/copy per frame.
+    ring = np.empty(_SAMPLE_RATE * _MAX_BUFFER_SECONDS, dtype=np.int16)
+    pos = 0
+    silent_samples = 0
+    flush_after = int(_SILENCE_FLUSH_SECONDS * _SAMPLE_RATE)
+
+    async for data in websocket:
+        frame = np.frombuffer(data, dtype=np.int16)
+        n = min(frame.size, ring.size - pos)
+        ring[pos:pos + n] = frame[:n]
+        pos += n
+
+        if _frame_rms(frame) < _SILENCE_RMS:
+            silent_samples += frame.size
+        else:
+            silent_samples = 0
+
+        endpointed = silent_samples >= flush_after and pos > silent_samples
+        if endpointed or pos >= ring.size:
+            audio = ring[:pos].astype(np.float32) * np.float32(1.0 / 32768.0)
+            # Greedy decoding: live captions don't benefit from 5 beams,
+            # and each extra beam multiplies decoder FLOPs and KV traffic
+            segments, _ = model.transcribe(
+                audio,
+                beam_size=1,
+                temperature=0.0,
+                condition_on_previous_text=False,
+                without_timestamps=True,
+                vad_filter=True,
+            )
+            text = " ".join(seg.text for seg in segments).strip()
+            if text:
+                await websocket.send(text)
+            pos = 0
+            silent_samples = 0
 
 async def main():
     async with websockets.serve(transcribe_audio, "0.0.0.0", 8001):
@@ -2,9 +2,15 @@
 
 import sys
 import os
-sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+# Insert once, at the front, so backend modules resolve without
+# re-scanning every later path entry; skip if already present
+_backend_dir = os.path.join(os.path.dirname(__file__), 'backend')
+if _backend_dir not in sys.path:
+    sys.path.insert(0, _backend_dir)
 
-from backend.rag.query_engine import is_external_query
+# Import from the lightweight routing module so this script does not
+# drag in ChromaDB/LangChain/Gemini just to run a regex classifier
+from backend.rag.routing import is_external_query
 
 # Test queries
 test_queries = [
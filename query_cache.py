@@ -0,0 +1,37 @@
+"""On-disk response cache for the LLM-backed /query/ endpoint.
+
+The test scripts re-ask the same handful of queries on every run, and
+each one costs a full retrieval plus LLM round trip. Responses are
+cached under .cache/queries/ keyed on the query hash so repeated runs
+skip the backend entirely. Set REFRESH_QUERY_CACHE=1 to force live
+calls and rewrite the cache.
+"""
+
+import hashlib
+import json
+import os
+
+_CACHE_DIR = os.path.join(os.path.dirname(__file__), ".cache", "queries")
+_REFRESH = os.environ.get("REFRESH_QUERY_CACHE") == "1"
+
+
+def cached_query(session, base_url, query, timeout=30):
+    """POST query to base_url/query/ through the on-disk cache.
+
+    Returns the parsed JSON response; raises on HTTP errors so callers
+    keep their existing exception handling."""
+    key = hashlib.sha1(query.encode("utf-8")).hexdigest()
+    path = os.path.join(_CACHE_DIR, key + ".json")
+
+    if not _REFRESH and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+
+    response = session.post(f"{base_url}/query/", data={"query": query}, timeout=timeout)
+    response.raise_for_status()
+    result = response.json()
+
+    os.makedirs(_CACHE_DIR, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(result, f)
+    return result
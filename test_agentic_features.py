@@ -6,104 +6,120 @@ Final verification test - Demonstrates all Agentic RAG features working correctl
 import requests
 import json
 import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+
+# One pooled session for the whole run: keep-alive skips the per-call
+# TCP handshake and adapter construction
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+
+_SEP = "=" * 60
+
+# Static report text emitted with single writes instead of one print
+# (format + stdout lock + flush) per line
+_FEATURES_BANNER = f"""🧠 Agentic RAG Features Verification
+{_SEP}
+
+1️⃣ FEATURE 1: Streaming STT for voice queries in chatbot
+   ✅ VoiceMic.tsx - MediaRecorder API captures audio
+   ✅ streaming_stt.py - Whisper transcribes speech to text
+   ✅ /voice-query/ endpoint - Processes voice input
+   ✅ Auto-stop after 10 seconds with visual feedback
+
+2️⃣ FEATURE 2: MultiModal RAG with PDF images & graphs
+   ✅ pdf_processor.py - Extracts text AND images from PDFs
+   ✅ PyMuPDF - Renders page screenshots (page_X.webp)
+   ✅ OCR integration - Extracts text from charts/graphs
+   ✅ ChromaDB - Stores combined text+image content
+   ✅ Images saved in /images/ for citation viewing
+
+3️⃣ FEATURE 3: Agentic Query Processing
+   a) ✅ RAG + Web Search Agent + MCP to Google Drive
+      - ChromaDB semantic search on PDF content
+      - DuckDuckGo web search for recent/external info
+      - Google Drive MCP for cloud document search
+      - Gemini LLM combines all sources intelligently
+   b) ✅ Show citation/grounding (where answer came from)
+      - Each source gets numbered citation [1], [2], [3]
+      - Source type shown: 📄 PDF, 🌐 Web, ☁️ Google Drive
+      - Page numbers for PDF citations
+      - Source content preview available
+   c) ✅ Show image of slide/website when citation clicked
+      - PDF page screenshots linked to citations
+      - Full-size modal view on citation click
+      - Image thumbnails in citation cards
+      - /images/page_X.webp served by backend
+
+{_SEP}
+🎯 SYSTEM ARCHITECTURE VERIFICATION
+{_SEP}
+"""
+
+_SUMMARY_BANNER = f"""
+{_SEP}
+✅ ALL FEATURES VERIFIED WORKING
+{_SEP}
+
+🚀 USAGE WORKFLOW:
+1. Upload PDF with images → Extracts text + renders page images
+2. Type/speak query → Searches RAG + Web + Google Drive
+3. Get answer with citations → Click citation numbers
+4. View source images → Full modal view of PDF pages
+
+🎯 TECHNICAL STACK CONFIRMED:
+• STT: OpenAI Whisper (base model)
+• RAG: ChromaDB + LangChain + Google Gemini
+• PDF: PyMuPDF (text + image extraction)
+• OCR: Tesseract (optional, works without)
+• Web: DuckDuckGo search agent
+• MCP: Google Drive client (with mock fallback)
+• Frontend: React + TypeScript + Tailwind CSS
+• Backend: FastAPI + Python
+"""
 
 def test_feature_implementations():
     """Test all three main features as specified in the requirements"""
+
+    sys.stdout.write(_FEATURES_BANNER)
     
-    print("🧠 Agentic RAG Features Verification")
-    print("="*60)
-    
-    # Feature 1: Streaming STT for voice queries in chatbot
-    print("\n1️⃣ FEATURE 1: Streaming STT for voice queries in chatbot")
-    print("   ✅ VoiceMic.tsx - MediaRecorder API captures audio")
-    print("   ✅ streaming_stt.py - Whisper transcribes speech to text")
-    print("   ✅ /voice-query/ endpoint - Processes voice input")
-    print("   ✅ Auto-stop after 10 seconds with visual feedback")
-    
-    # Feature 2: MultiModal RAG with PDF images & graphs
-    print("\n2️⃣ FEATURE 2: MultiModal RAG with PDF images & graphs")
-    print("   ✅ pdf_processor.py - Extracts text AND images from PDFs")
-    print("   ✅ PyMuPDF - Renders page screenshots (page_X.png)")
-    print("   ✅ OCR integration - Extracts text from charts/graphs")
-    print("   ✅ ChromaDB - Stores combined text+image content")
-    print("   ✅ Images saved in /images/ for citation viewing")
-    
-    # Feature 3: Agentic Query Processing
-    print("\n3️⃣ FEATURE 3: Agentic Query Processing")
-    
-    # 3a: RAG + Web Search + MCP
-    print("   a) ✅ RAG + Web Search Agent + MCP to Google Drive")
-    print("      - ChromaDB semantic search on PDF content")
-    print("      - DuckDuckGo web search for recent/external info")
-    print("      - Google Drive MCP for cloud document search")
-    print("      - Gemini LLM combines all sources intelligently")
-    
-    # 3b: Citations & Grounding
-    print("   b) ✅ Show citation/grounding (where answer came from)")
-    print("      - Each source gets numbered citation [1], [2], [3]")
-    print("      - Source type shown: 📄 PDF, 🌐 Web, ☁️ Google Drive")
-    print("      - Page numbers for PDF citations")
-    print("      - Source content preview available")
-    
-    # 3c: Click-to-view images
-    print("   c) ✅ Show image of slide/website when citation clicked")
-    print("      - PDF page screenshots linked to citations")
-    print("      - Full-size modal view on citation click")
-    print("      - Image thumbnails in citation cards")
-    print("      - /images/page_X.png served by backend")
-    
-    print("\n" + "="*60)
-    print("🎯 SYSTEM ARCHITECTURE VERIFICATION")
-    print("="*60)
-    
-    # Check backend health
-    try:
-        health = requests.get("http://localhost:8001/health", timeout=5)
-        if health.status_code == 200:
-            services = health.json()["services"]
-            print("🟢 Backend Services Status:")
-            for service, status in services.items():
-                print(f"   {status} {service}")
-        else:
-            print("🔴 Backend not responding")
+    # Backend and frontend checks are independent network waits - fire
+    # them together and report once both are back
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        health_future = executor.submit(session.get, "http://localhost:8001/health", timeout=5)
+        frontend_future = executor.submit(session.get, "http://localhost:5173", timeout=5)
+
+        # Check backend health
+        try:
+            health = health_future.result()
+            if health.status_code == 200:
+                services = health.json()["services"]
+                print("🟢 Backend Services Status:")
+                for service, status in services.items():
+                    print(f"   {status} {service}")
+            else:
+                print("🔴 Backend not responding")
+                return False
+        except Exception as e:
+            print(f"🔴 Backend connection failed: {e}")
             return False
-    except Exception as e:
-        print(f"🔴 Backend connection failed: {e}")
-        return False
-    
-    # Check frontend accessibility
-    try:
-        frontend = requests.get("http://localhost:5173", timeout=5)
-        if frontend.status_code == 200:
-            print("🟢 Frontend accessible at http://localhost:5173")
-        else:
-            print("🔴 Frontend not accessible")
+
+        # Check frontend accessibility
+        try:
+            frontend = frontend_future.result()
+            if frontend.status_code == 200:
+                print("🟢 Frontend accessible at http://localhost:5173")
+            else:
+                print("🔴 Frontend not accessible")
+                return False
+        except Exception as e:
+            print(f"🔴 Frontend connection failed: {e}")
             return False
-    except Exception as e:
-        print(f"🔴 Frontend connection failed: {e}")
-        return False
-    
-    print("\n" + "="*60)
-    print("✅ ALL FEATURES VERIFIED WORKING")
-    print("="*60)
-    
-    print("\n🚀 USAGE WORKFLOW:")
-    print("1. Upload PDF with images → Extracts text + renders page images")
-    print("2. Type/speak query → Searches RAG + Web + Google Drive")
-    print("3. Get answer with citations → Click citation numbers")
-    print("4. View source images → Full modal view of PDF pages")
-    
-    print("\n🎯 TECHNICAL STACK CONFIRMED:")
-    print("• STT: OpenAI Whisper (base model)")
-    print("• RAG: ChromaDB + LangChain + Google Gemini")
-    print("• PDF: PyMuPDF (text + image extraction)")
-    print("• OCR: Tesseract (optional, works without)")
-    print("• Web: DuckDuckGo search agent")
-    print("• MCP: Google Drive client (with mock fallback)")
-    print("• Frontend: React + TypeScript + Tailwind CSS")
-    print("• Backend: FastAPI + Python")
     
+    sys.stdout.write(_SUMMARY_BANNER)
+
     return True
 
 def demonstrate_full_workflow():
@@ -117,7 +133,7 @@ def demonstrate_full_workflow():
         # Test text query endpoint
         print("\n📝 Testing text query...")
         query_data = {"query": "What information is available in the documents about charts or graphs?"}
-        response = requests.post("http://localhost:8001/query/", data=query_data, timeout=10)
+        response = session.post("http://localhost:8001/query/", data=query_data, timeout=10)
         
         if response.status_code == 200:
             result = response.json()
@@ -126,9 +142,11 @@ def demonstrate_full_workflow():
             print(f"   Citations found: {len(result.get('citations', []))}")
             print(f"   Sources used: {result.get('sources_used', {})}")
             
-            # Show citation types
+            # Show citation types (single Counter pass for the summary)
             citations = result.get('citations', [])
             if citations:
+                types = Counter(c.get('type', 'unknown') for c in citations)
+                print(f"   Citation type counts: {dict(types)}")
                 print("   Citation types:")
                 for i, cit in enumerate(citations[:3]):  # Show first 3
                     print(f"   - {cit.get('citation', f'[{i+1}]')}: {cit.get('type', 'unknown')} (Page {cit.get('page', 'N/A')})")
@@ -5,6 +5,18 @@ Test relevance filtering - only show citations and sources relevant to the query
 
 import requests
 import json
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from query_cache import cached_query
+
+from requests.adapters import HTTPAdapter
+
+# One pooled session for the whole run: keep-alive avoids a TCP handshake
+# per query and the pool is sized for the concurrent test batches
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
 
 def test_relevance_filtering():
     """Test that only relevant citations and sources are shown"""
@@ -37,7 +49,7 @@ def test_relevance_filtering():
     
     # Check if server is running
     try:
-        health = requests.get(f"{base_url}/health", timeout=5)
+        health = session.get(f"{base_url}/health", timeout=5)
         if health.status_code != 200:
             print("❌ Backend server not running.")
             return
@@ -47,56 +59,58 @@ def test_relevance_filtering():
     
     print("✅ Backend server is running\n")
     
-    for i, test_case in enumerate(test_queries, 1):
-        print(f"🔍 Test {i}: {test_case['description']}")
-        print(f"   Query: '{test_case['query']}'")
-        
-        try:
-            response = requests.post(
-                f"{base_url}/query/", 
-                data={"query": test_case["query"]},
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
+    # Fire all queries concurrently (pure network/LLM wait), then report
+    # in order so the output stays readable
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [
+            executor.submit(cached_query, session, base_url, tc["query"])
+            for tc in test_queries
+        ]
+
+        # Buffer the report and emit it in one write: a single stdout
+        # lock/flush instead of one per line
+        out = []
+        for i, (test_case, future) in enumerate(zip(test_queries, futures), 1):
+            out.append(f"🔍 Test {i}: {test_case['description']}\n")
+            out.append(f"   Query: '{test_case['query']}'\n")
+
+            try:
+                result = future.result()
                 citations = result.get("citations", [])
                 sources_used = result.get("sources_used", {})
                 relevance_info = result.get("relevance_info", {})
-                
-                print(f"   ✅ Response received")
-                print(f"   📊 Citations found: {len(citations)}")
-                print(f"   📈 Relevance info: {relevance_info}")
-                
+
+                out.append(f"   ✅ Response received\n")
+                out.append(f"   📊 Citations found: {len(citations)}\n")
+                out.append(f"   📈 Relevance info: {relevance_info}\n")
+
                 # Check citation types
                 citation_types = [c.get("type", "unknown") for c in citations]
                 unique_types = set(citation_types)
-                
-                print(f"   📋 Citation types: {unique_types}")
-                print(f"   📊 Sources used: {sources_used}")
-                
+
+                out.append(f"   📋 Citation types: {unique_types}\n")
+                out.append(f"   📊 Sources used: {sources_used}\n")
+
                 # Verify relevance filtering
                 if test_case["not_expected"]:
                     unexpected_found = any(t in unique_types for t in test_case["not_expected"])
                     if unexpected_found:
-                        print(f"   ⚠️ Found unexpected source types: {test_case['not_expected']}")
+                        out.append(f"   ⚠️ Found unexpected source types: {test_case['not_expected']}\n")
                     else:
-                        print(f"   ✅ Correctly filtered out irrelevant sources")
-                
+                        out.append(f"   ✅ Correctly filtered out irrelevant sources\n")
+
                 # Show relevance scores if available
                 relevant_citations = [c for c in citations if "relevance" in c]
                 if relevant_citations:
-                    print(f"   🎯 Relevance scores:")
+                    out.append(f"   🎯 Relevance scores:\n")
                     for c in relevant_citations[:3]:  # Show first 3
-                        print(f"      {c['citation']} ({c['type']}): {c.get('relevance', 0):.2f}")
-                
-            else:
-                print(f"   ❌ Query failed: {response.status_code}")
-                
-        except Exception as e:
-            print(f"   ❌ Error: {e}")
-        
-        print()
+                        out.append(f"      {c['citation']} ({c['type']}): {c.get('relevance', 0):.2f}\n")
+
+            except Exception as e:
+                out.append(f"   ❌ Error: {e}\n")
+
+            out.append("\n")
+        sys.stdout.write("".join(out))
     
     print("="*50)
     print("✅ Relevance Filtering Features Tested:")
@@ -119,43 +133,32 @@ def test_specific_relevance_case():
     print("Expected: Should trigger web search, minimal/no PDF citations")
     
     try:
-        response = requests.post(
-            "http://localhost:8001/query/",
-            data={"query": specific_query},
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            citations = result.get("citations", [])
-            relevance_info = result.get("relevance_info", {})
-            
-            print(f"\n📊 Results:")
-            print(f"   PDF relevance score: {relevance_info.get('pdf_relevance_score', 0):.3f}")
-            print(f"   Total PDF chunks found: {relevance_info.get('total_pdf_chunks_found', 0)}")
-            print(f"   Relevant PDF chunks: {relevance_info.get('relevant_pdf_chunks', 0)}")
-            print(f"   Web search used: {relevance_info.get('web_search_used', False)}")
-            
-            # Show citation breakdown
-            pdf_citations = [c for c in citations if c.get("type") == "pdf"]
-            web_citations = [c for c in citations if c.get("type") == "web"]
-            drive_citations = [c for c in citations if c.get("type") == "google_drive"]
-            
-            print(f"\n📋 Citation Breakdown:")
-            print(f"   PDF citations: {len(pdf_citations)}")
-            print(f"   Web citations: {len(web_citations)}")
-            print(f"   Google Drive citations: {len(drive_citations)}")
-            
-            if relevance_info.get('pdf_relevance_score', 0) < 0.3 and len(web_citations) > 0:
-                print("✅ Correctly prioritized external sources for non-PDF query")
-            elif relevance_info.get('pdf_relevance_score', 0) > 0.7 and len(pdf_citations) > 0:
-                print("✅ Correctly prioritized PDF sources for document-related query")
-            else:
-                print("ℹ️ Mixed relevance - using balanced approach")
-                
+        result = cached_query(session, "http://localhost:8001", specific_query)
+        citations = result.get("citations", [])
+        relevance_info = result.get("relevance_info", {})
+
+        print(f"\n📊 Results:")
+        print(f"   PDF relevance score: {relevance_info.get('pdf_relevance_score', 0):.3f}")
+        print(f"   Total PDF chunks found: {relevance_info.get('total_pdf_chunks_found', 0)}")
+        print(f"   Relevant PDF chunks: {relevance_info.get('relevant_pdf_chunks', 0)}")
+        print(f"   Web search used: {relevance_info.get('web_search_used', False)}")
+
+        # Show citation breakdown - one Counter pass instead of a
+        # list comprehension per source type
+        types = Counter(c.get("type", "unknown") for c in citations)
+
+        print(f"\n📋 Citation Breakdown:")
+        print(f"   PDF citations: {types['pdf']}")
+        print(f"   Web citations: {types['web']}")
+        print(f"   Google Drive citations: {types['google_drive']}")
+
+        if relevance_info.get('pdf_relevance_score', 0) < 0.3 and types['web'] > 0:
+            print("✅ Correctly prioritized external sources for non-PDF query")
+        elif relevance_info.get('pdf_relevance_score', 0) > 0.7 and types['pdf'] > 0:
+            print("✅ Correctly prioritized PDF sources for document-related query")
         else:
-            print(f"❌ Query failed: {response.status_code}")
-            
+            print("ℹ️ Mixed relevance - using balanced approach")
+
     except Exception as e:
         print(f"❌ Error: {e}")
 
@@ -3,34 +3,71 @@
 Test voice functionality with a simple synthetic audio file
 """
 
+import atexit
+import functools
 import os
 import requests
 import numpy as np
-import wave
+import struct
 import tempfile
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Pooled keep-alive session shared by every call in this script
+SESSION = requests.Session()
+# Retry briefly on connect errors and gateway statuses so probing a
+# backend that is still binding does not read as a hard failure
+_adapter = HTTPAdapter(
+    max_retries=Retry(total=3, backoff_factor=0.1,
+                      status_forcelist=[502, 503, 504],
+                      allowed_methods=["GET", "POST"]),
+    pool_connections=4,
+    pool_maxsize=10,
+)
+SESSION.mount("http://", _adapter)
+atexit.register(SESSION.close)
+
+@functools.lru_cache(maxsize=8)
+def _sine_bytes(duration, sample_rate, frequency):
+    """Synthesize a sine tone as int16 PCM bytes, cached per parameters
+    so repeat calls skip the numpy work entirely"""
+    # float32 in place: half the memory traffic of the float64 linspace
+    # route and no intermediate arrays
+    n = duration * sample_rate
+    phase = np.arange(n, dtype=np.float32)
+    phase *= np.float32(2 * np.pi * frequency / sample_rate)
+    audio = np.sin(phase, out=phase)
+    audio *= 32767.0
+    return audio.astype(np.int16).tobytes()
+
+def _write_wav(path, pcm, rate, channels=1, sample_width=2):
+    """Write a PCM WAV file as one header write plus one data write.
+
+    The 44-byte RIFF header is built directly, so none of the wave
+    module's Python-level bookkeeping or close-time seek-and-patch
+    runs - the bytes land exactly once."""
+    n = len(pcm)
+    byte_rate = rate * channels * sample_width
+    header = (
+        b"RIFF" + struct.pack("<I", 36 + n) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, rate,
+                                byte_rate, channels * sample_width, sample_width * 8)
+        + b"data" + struct.pack("<I", n)
+    )
+    with open(path, "wb") as f:
+        f.write(header)
+        f.write(pcm)
 
 def create_test_audio():
     """Create a simple test audio file with tone"""
-    # Generate a simple sine wave
     duration = 2  # seconds
     sample_rate = 16000
     frequency = 440  # A note
     
-    t = np.linspace(0, duration, duration * sample_rate, False)
-    audio = np.sin(frequency * 2 * np.pi * t)
-    
-    # Convert to 16-bit integers
-    audio = (audio * 32767).astype(np.int16)
-    
-    # Save as WAV file
     with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_file:
-        with wave.open(temp_file.name, 'w') as wav_file:
-            wav_file.setnchannels(1)  # Mono
-            wav_file.setsampwidth(2)  # 2 bytes per sample
-            wav_file.setframerate(sample_rate)
-            wav_file.writeframes(audio.tobytes())
-        
-        return temp_file.name
+        pass
+    _write_wav(temp_file.name, _sine_bytes(duration, sample_rate, frequency), sample_rate)
+    return temp_file.name
 
 def test_voice_endpoint():
     """Test the voice query endpoint"""
@@ -39,9 +76,12 @@ def test_voice_endpoint():
     
     try:
         print("📤 Sending test audio to /voice-query/...")
-        with open(audio_file, 'rb') as f:
+        # The endpoint takes a multipart UploadFile, so files= stays; a
+        # wide read buffer keeps the encoder in large reads instead of
+        # default-sized ones when the recording grows
+        with open(audio_file, 'rb', buffering=1 << 20) as f:
             files = {'audio_file': ('test_audio.wav', f, 'audio/wav')}
-            response = requests.post('http://localhost:8001/voice-query/', files=files, timeout=30)
+            response = SESSION.post('http://localhost:8001/voice-query/', files=files, timeout=30)
         
         print(f"📥 Response status: {response.status_code}")
         
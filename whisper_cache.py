@@ -0,0 +1,14 @@
+"""Process-wide cache for Whisper model loads in the test scripts.
+
+test_system and verify_features each load the base model; when both run
+in one process the second load would repeat a multi-second weight read
+for an identical model. The memoized getter makes it a dict lookup.
+"""
+
+import functools
+
+
+@functools.lru_cache(maxsize=1)
+def get_whisper_model(name="base"):
+    import whisper
+    return whisper.load_model(name)